@@ -0,0 +1,124 @@
+"""Command-reply latency during a heavy forward ingest, with and without the API scheduler.
+
+The fake NapCat answers a few requests at a time (like the real one), so
+whatever fwlog has in flight is what a reply queues behind. A burst of
+get_forward_msg calls and file uploads is started, then command replies are
+sent on a fixed schedule to --groups different groups and timed. A second
+phase fires a burst of send_group_msg at one group and reports the rate they
+actually went out at. The scheduled case runs with the shipped settings unless
+--message-rate is given.
+
+    python bench/bench_api_scheduler.py
+    python bench/bench_api_scheduler.py --fetches 1000 --concurrency 2 --latency 0.01
+    python bench/bench_api_scheduler.py --groups 1 --message-rate 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+from fake_onebot import FakeOneBot  # noqa: E402
+
+UNSCHEDULED = {"API_MAX_PENDING": 0, "API_RATE_LIMITS": {"message": None, "fetch": None, "upload": None}}
+
+
+async def run_case(args, config):
+    saved = {name: getattr(bot, name) for name in config}
+    bot.__dict__.update(config)
+    server = await FakeOneBot(latency=args.latency, concurrency=args.concurrency).start()
+    server.forwards = {f"f{i}": [] for i in range(args.fetches)}
+    client = bot.BotClient({"name": "bench", "url": server.url, "token": ""})
+    task = asyncio.create_task(client.run())
+    try:
+        await asyncio.wait_for(client.connected.wait(), 10)
+        peak = [0]
+
+        async def watch_pending():
+            while True:
+                peak[0] = max(peak[0], len(client.pending))
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.create_task(watch_pending())
+        t0 = time.perf_counter()
+        ingest = [asyncio.create_task(client.send_api("get_forward_msg", {"id": f"f{i}"}))
+                  for i in range(args.fetches)]
+        ingest += [asyncio.create_task(client.send_api("upload_group_file", {
+            "group_id": "1", "file": "base64://" + "QUJD" * 1024, "name": f"log{i}.txt"}))
+            for i in range(args.uploads)]
+        ingest_done = []
+
+        async def ingest_timer():
+            await asyncio.gather(*ingest)
+            ingest_done.append(time.perf_counter() - t0)
+
+        async def reply(i):
+            # Fired on a fixed schedule, so the replies sample the whole ingest
+            await asyncio.sleep(i * args.reply_gap)
+            t1 = time.perf_counter()
+            group_id = str(i % args.groups + 1)
+            await client.send_api("send_group_msg", {"group_id": group_id, "message": f"【日志列表】{i}"})
+            return time.perf_counter() - t1
+
+        timer = asyncio.create_task(ingest_timer())
+        latencies = await asyncio.gather(*(reply(i) for i in range(args.replies)))
+        await timer
+        ingest_time = ingest_done[0]
+        watcher.cancel()
+
+        t2 = time.perf_counter()
+        await asyncio.gather(*(client.send_api("send_group_msg", {"group_id": "1", "message": f"提醒 {i}"})
+                               for i in range(args.burst)))
+        burst_time = time.perf_counter() - t2
+        return latencies, ingest_time, burst_time, peak[0]
+    finally:
+        task.cancel()
+        await server.close()
+        bot.__dict__.update(saved)
+
+
+def report(label, latencies, ingest_time, burst_time, peak, args):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<12} reply p50 {statistics.median(ordered) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  "
+          f"ingest {ingest_time:5.2f}s  {args.burst} messages in {burst_time:5.2f}s "
+          f"({args.burst / burst_time:5.1f}/s)  peak pending {peak}")
+
+
+async def main_async(args):
+    bot.logger.disabled = True
+    scheduled = {}
+    if args.message_rate is not None:
+        scheduled["API_RATE_LIMITS"] = dict(bot.API_RATE_LIMITS, message=(args.message_rate, args.message_burst))
+    limit = scheduled.get("API_RATE_LIMITS", bot.API_RATE_LIMITS)["message"]
+    per = "target" if "message" in bot.API_RATE_LIMIT_PER_TARGET else "bot"
+    print(f"fetches={args.fetches} uploads={args.uploads} replies={args.replies} to {args.groups} groups  "
+          f"napcat concurrency={args.concurrency} latency={args.latency * 1000:.0f} ms  "
+          f"API_MAX_PENDING={bot.API_MAX_PENDING}  message limit {limit} per {per}")
+    before = await run_case(args, UNSCHEDULED)
+    report("unscheduled", *before, args)
+    after = await run_case(args, scheduled)
+    report("scheduled", *after, args)
+    print(f"reply p50 x{statistics.median(before[0]) / statistics.median(after[0]):.1f} faster")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fetches", type=int, default=400)
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--replies", type=int, default=20)
+    parser.add_argument("--reply-gap", type=float, default=0.1)
+    parser.add_argument("--groups", type=int, default=10, help="groups the replies are spread over")
+    parser.add_argument("--burst", type=int, default=10, help="send_group_msg fired at one group in phase two")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests the fake NapCat works on at once")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake NapCat time per request (s)")
+    parser.add_argument("--message-rate", type=float, help="override the shipped message lane rate")
+    parser.add_argument("--message-burst", type=int, default=5, help="burst used with --message-rate")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
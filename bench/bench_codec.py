@@ -0,0 +1,214 @@
+"""Replay OneBot frames through the reader path: stdlib json.loads vs. each installed codec.
+
+The default replay is a synthetic capture of a busy group: heartbeats, notices,
+chatter with mixed segments, forwards, commands and API responses. A real
+capture can be replayed instead, one raw frame per line:
+
+    python bench/bench_codec.py --frames 200000
+    python bench/bench_codec.py --record frames.jsonl   # write the synthetic replay
+    python bench/bench_codec.py --replay frames.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+
+SELF_ID = 10001
+
+
+def dump(obj):
+    # NapCat serialises with JSON.stringify: no spaces, non-ASCII kept as-is
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def sender(uid):
+    # One member is literally called "echo", which must not look like an API response
+    nickname = "echo" if uid % 17 == 0 else f"调查员{uid % 17}"
+    return {"user_id": uid, "nickname": nickname, "card": f"PL{uid % 17}", "role": "member"}
+
+
+def group_message(rng, i, segments):
+    uid = 20000 + rng.randrange(80)
+    return dump({
+        "self_id": SELF_ID, "user_id": uid, "time": 1700000000 + i, "message_id": 1000000 + i,
+        "message_seq": 1000000 + i, "real_id": 1000000 + i, "message_type": "group", "sender": sender(uid),
+        "raw_message": "", "font": 14, "sub_type": "normal", "message": segments, "message_format": "array",
+        "post_type": "message", "group_id": 700000 + rng.randrange(3),
+    })
+
+
+def chatter(rng, i):
+    segments = [{"type": "text", "data": {"text": f"第 {i} 条聊天：今晚的团几点开始？我这边大概九点后有空。"}}]
+    roll = rng.random()
+    if roll < 0.2:
+        segments.insert(0, {"type": "reply", "data": {"id": str(1000000 + i - 3)}})
+        segments.insert(1, {"type": "at", "data": {"qq": str(20000 + i % 80), "name": "KP"}})
+    elif roll < 0.35:
+        segments.append({"type": "image", "data": {
+            "file": f"{i:032x}.image", "url": f"https://multimedia.nt.qq.com.cn/download?appid=1407&fileid={i:064x}",
+            "summary": "[图片]", "file_size": "123456",
+        }})
+    elif roll < 0.4:
+        segments = [{"type": "json", "data": {"data": dump({
+            "app": "com.tencent.miniapp", "meta": {"detail": {"title": "分享", "desc": "一张\"卡片\"" * 20}},
+        })}}]
+    return group_message(rng, i, segments)
+
+
+def notice(rng, i):
+    kind = rng.choice(["group_recall", "notify", "group_increase"])
+    event = {"time": 1700000000 + i, "self_id": SELF_ID, "post_type": "notice", "notice_type": kind,
+             "group_id": 700000, "user_id": 20000 + i % 80, "operator_id": 20000}
+    if kind == "notify":
+        event.update(sub_type="poke", target_id=SELF_ID)
+    return dump(event)
+
+
+def heartbeat(i):
+    return dump({"time": 1700000000 + i, "self_id": SELF_ID, "post_type": "meta_event", "meta_event_type": "heartbeat",
+                 "status": {"online": True, "good": True}, "interval": 30000})
+
+
+def forward_response(i, nodes=100):
+    return dump({"status": "ok", "retcode": 0, "data": {"messages": [
+        {"self_id": SELF_ID, "user_id": 20000 + n % 5, "time": 1700000000 + n, "message_id": n,
+         "message_type": "group", "sender": sender(20000 + n % 5),
+         "message": [{"type": "text", "data": {"text": f"（第 {n} 条）守秘人描述了走廊尽头的那扇门。"}}]}
+        for n in range(nodes)
+    ]}, "message": "", "wording": "", "echo": f"fwlog-{i}"})
+
+
+def synthetic_frames(count, seed=1):
+    rng = random.Random(seed)
+    frames = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.62:
+            frames.append(chatter(rng, i))
+        elif roll < 0.77:
+            frames.append(notice(rng, i))
+        elif roll < 0.90:
+            frames.append(heartbeat(i))
+        elif roll < 0.93:
+            frames.append(group_message(rng, i, [{"type": "forward", "data": {"id": f"fwd{i}"}}]))
+        elif roll < 0.95:
+            frames.append(group_message(rng, i, [{"type": "text", "data": {"text": ".fwlog list"}}]))
+        elif roll < 0.96:
+            frames.append(forward_response(i))
+        else:
+            frames.append(dump({"status": "ok", "retcode": 0, "data": {"message_id": i}, "echo": f"fwlog-{i}"}))
+    return frames
+
+
+class RecordingDispatcher:
+    """Stands in for the real dispatcher: runs the same pre-filter, keeps the verdicts."""
+
+    def __init__(self):
+        self.offered = []
+
+    def offer(self, client, event):
+        kind, text = bot.classify_event(event)
+        self.offered.append((kind, text))
+
+
+class LegacyClient(bot.BotClient):
+    def handle_frame(self, message):
+        # The reader loop as it was before the codec layer
+        try:
+            data = json.loads(message)
+        except Exception:
+            return
+        if isinstance(data, dict) and "echo" in data:
+            self.handle_api_response(data)
+            return
+        if isinstance(data, dict):
+            if data.get("post_type") == "message" and data.get("message_type") in ["group", "private"]:
+                bot.dispatcher.offer(self, data)
+
+
+def replay(client, frames, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        bot.dispatcher = RecordingDispatcher()
+        t0 = time.perf_counter()
+        for raw in frames:
+            client.handle_frame(raw)
+        best = min(best, time.perf_counter() - t0)
+    return best, bot.dispatcher.offered
+
+
+def encode_payloads():
+    b64 = "base64://" + "QUJD" * (1 << 18)
+    return [
+        {"action": "send_group_msg", "params": {"group_id": "700000", "message": "【日志列表】 本会话 fwlog 列表:\n- 测试"},
+         "echo": "fwlog-1"},
+        {"action": "get_forward_msg", "params": {"id": "7301234567890123456"}, "echo": "fwlog-2"},
+        {"action": "upload_group_file", "params": {"group_id": "700000", "file": b64, "name": "日志.txt"}, "echo": "fwlog-3"},
+    ]
+
+
+def time_encode(dumps, payloads, repeat=200):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in payloads:
+            dumps(p)
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100_000)
+    parser.add_argument("--replay", help="file with one raw frame per line")
+    parser.add_argument("--record", help="write the synthetic replay to this file and exit")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.frames)
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            f.writelines(frame + "\n" for frame in frames)
+        print(f"wrote {len(frames)} frames to {args.record}")
+        return
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            frames = [line.rstrip("\n") for line in f if line.strip()]
+
+    # Recording states so forwards pass the pre-filter like in a live session
+    for gid in range(700000, 700003):
+        bot.group_states[str(gid)] = {"group_id": str(gid), "current_log_name": "bench", "recording": 1}
+    size = sum(len(f.encode("utf-8")) for f in frames)
+    print(f"frames={len(frames)} ({size / 2**20:.1f} MiB)")
+
+    cfg = {"name": "bench", "url": "ws://127.0.0.1:1", "token": ""}
+    base, expected = replay(LegacyClient(cfg), frames, args.repeat)
+    print(f"{'stdlib (before)':<18} {base * 1000:8.1f} ms  {len(frames) / base:10.0f} frames/s")
+    for name in bot.CODECS:
+        try:
+            bot.codec = bot.create_codec(name)
+        except RuntimeError:
+            print(f"{name:<18} not installed")
+            continue
+        elapsed, offered = replay(bot.BotClient(cfg), frames, args.repeat)
+        assert offered == expected, f"{name}: pre-filter verdicts differ from the stdlib path"
+        print(f"{name:<18} {elapsed * 1000:8.1f} ms  {len(frames) / elapsed:10.0f} frames/s  x{base / elapsed:.2f}")
+
+    payloads = encode_payloads()
+    legacy = time_encode(lambda p: json.dumps(p, ensure_ascii=False), payloads)
+    print(f"encode stdlib      {legacy * 1e6:8.1f} us per send_api batch")
+    for name in bot.CODECS:
+        try:
+            enc = bot.create_codec(name)
+        except RuntimeError:
+            continue
+        assert json.loads(enc.dumps(payloads[0])) == payloads[0]
+        spent = time_encode(enc.dumps, payloads)
+        print(f"encode {name:<11} {spent * 1e6:8.1f} us per send_api batch  x{legacy / spent:.2f}")
+
+
+if __name__ == "__main__":
+    main()
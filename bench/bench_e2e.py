@@ -0,0 +1,415 @@
+"""End-to-end benchmark: a fake OneBot replays a seeded workload into main_loop().
+
+The backend runs in its own process, exactly as `python fwlog_ws_bot.py` would,
+connected to a fake NapCat in this process. The replay mixes chatter,
+`.fwlog list` / `.fwlog get` commands and forwards (some nested, some with
+thousands of nodes); get_forward_msg and uploads are answered with
+configurable latency. The run ends when every group has answered a final
+`.fwlog list`, whose item counts are checked against what was sent.
+
+Reported: events/s and stored items/s, p50/p99 command latency (time from
+the command event to fwlog's answer), DB time and event-handling time from
+the backend's /metrics, and the backend's peak RSS.
+
+To compare commits, save a run with --json and pass it to a later run with
+--compare. --repo runs the backend from another checkout with the same
+workload, e.g. a worktree of an older commit:
+
+    python bench/bench_e2e.py --json after.json
+    git worktree add /tmp/fwlog-base HEAD~3
+    python bench/bench_e2e.py --repo /tmp/fwlog-base --json before.json
+    python bench/bench_e2e.py --compare before.json
+
+Older backends without /metrics report no DB time.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_onebot import FakeOneBot  # noqa: E402
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SELF_ID = 10001
+# What counts as fwlog's answer to each command; `.fwlog get` answers with the upload itself
+ANSWERS = {
+    "new": ("【新建日志】",),
+    "list": ("【日志列表】",),
+    "get": ("upload", "【发送失败】", "指定日志", "[CQ:file"),
+}
+
+
+def dump(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def text(s):
+    return [{"type": "text", "data": {"text": s}}]
+
+
+def group_event(group, user_id, segments, msg_id):
+    return dump({
+        "self_id": SELF_ID, "time": 1700000000 + msg_id, "post_type": "message", "message_type": "group",
+        "sub_type": "normal", "message_id": msg_id, "group_id": group, "user_id": user_id,
+        "sender": {"user_id": user_id, "nickname": f"玩家{user_id % 10}", "card": "", "role": "member"},
+        "message": segments, "raw_message": "", "font": 0,
+    })
+
+
+def build_forward(forwards, fid, nodes, depth):
+    """Register forward `fid` (nesting `depth` levels deep) and return how many items it expands to."""
+    out = [
+        {"message_id": f"{fid}-{n}", "time": 1700000000 + n,
+         "sender": {"user_id": 20000 + n % 5, "nickname": f"调查员{n % 5}"},
+         "message": text(f"（{fid} 第 {n} 条）守秘人描述了走廊尽头的那扇门。\n门把手上沾着些许潮湿的痕迹。")}
+        for n in range(nodes if depth == 1 else nodes - 1)
+    ]
+    count = len(out)
+    if depth > 1:
+        sub = f"{fid}.n"
+        out.append({"message_id": f"{fid}-nest", "time": 1700000000 + nodes,
+                    "sender": {"user_id": 20000, "nickname": "调查员0"},
+                    "message": [{"type": "forward", "data": {"id": sub}}]})
+        count += build_forward(forwards, sub, nodes, depth - 1)
+    forwards[fid] = out
+    return count
+
+
+def build_workload(args):
+    """Seeded replay; returns (frames, forwards, expected items per group)."""
+    rng = random.Random(args.seed)
+    groups = [500000 + g for g in range(args.groups)]
+    forwards = {}
+    expected = {g: 0 for g in groups}
+    frames = []
+    for i in range(args.events):
+        group = groups[i % len(groups)]
+        roll = rng.random()
+        if roll < args.forward_ratio:
+            fid = f"f{i}"
+            nodes = args.large_nodes if rng.random() < args.large_ratio else args.nodes
+            depth = args.depth if rng.random() < args.nested_ratio else 1
+            expected[group] += build_forward(forwards, fid, nodes, depth)
+            frames.append(("event", group, group_event(group, 30000, [{"type": "forward", "data": {"id": fid}}], i)))
+        elif roll < args.forward_ratio + args.command_ratio:
+            if rng.random() < args.get_ratio:
+                frames.append(("get", group, group_event(group, 30000, text(".fwlog get bench"), i)))
+            else:
+                frames.append(("list", group, group_event(group, 30000, text(".fwlog list"), i)))
+        else:
+            frames.append(("event", group, group_event(
+                group, 30000 + i % 50, text(f"普通聊天消息 {i}，今天的团什么时候开始？[CQ:face,id=1]"), i)))
+    return groups, frames, forwards, expected
+
+
+class ReplayServer(FakeOneBot):
+    """Times each command from the moment its event is sent until fwlog answers in that group."""
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.sent = deque(maxlen=1000)
+        # group -> deque of (sent at, kind, future or None)
+        self.outstanding = {}
+        self.latencies = {"list": [], "get": []}
+        self.failed = 0
+        self.uploaded = 0
+
+    def answered(self, group, msg):
+        waiting = self.outstanding.get(group)
+        if not waiting or not msg.startswith(ANSWERS[waiting[0][1]]):
+            return
+        sent_at, kind, fut = waiting.popleft()
+        if kind in self.latencies:
+            self.latencies[kind].append(time.perf_counter() - sent_at)
+        if msg.startswith("【发送失败】"):
+            self.failed += 1
+        if fut is not None and not fut.done():
+            fut.set_result(msg)
+
+    async def on_send_group_msg(self, params):
+        self.answered(int(params["group_id"]), str(params.get("message", "")))
+        return {"message_id": len(self.sent)}
+
+    async def on_upload_group_file(self, params):
+        self.uploaded += len(params.get("file", ""))
+        self.answered(int(params["group_id"]), "upload")
+        return None
+
+    async def send_frame(self, raw):
+        for ws in list(self.connections):
+            await ws.send(raw)
+
+    def expect(self, group, kind, wait=False):
+        fut = asyncio.get_running_loop().create_future() if wait else None
+        self.outstanding.setdefault(group, deque()).append((time.perf_counter(), kind, fut))
+        return fut
+
+    async def command(self, group, cmd, kind):
+        fut = self.expect(group, kind, wait=True)
+        await self.send_frame(group_event(group, 30000, text(cmd), 0))
+        return await asyncio.wait_for(fut, 300)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def backend(repo, config):
+    # Older backends print every event; keep the report readable
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    sys.path.insert(0, repo)
+    import fwlog_ws_bot as bot
+
+    bot.__dict__.update(config)
+    if hasattr(bot, "setup_logging"):
+        bot.setup_logging()
+    if not hasattr(bot, "storage"):
+        # Before the storage layer, main() set up the database
+        for name in ("init_db", "migrate_json_to_sqlite"):
+            if hasattr(bot, name):
+                getattr(bot, name)()
+    asyncio.run(bot.main_loop())
+
+
+def peak_rss_mib(pid):
+    """Peak resident set size of a running process (VmHWM), in MiB."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def scrape_metrics(port):
+    """Sum of each metric family in the backend's /metrics, or {} if it has none."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=10) as resp:
+            body = resp.read().decode("utf-8")
+    except OSError:
+        return {}
+    totals = {}
+    for line in body.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = re.match(r"([a-zA-Z_:]+)(\{[^}]*\})? (\S+)", line)
+        if m:
+            key = m.group(1) + (m.group(2) or "")
+            totals[key] = float(m.group(3))
+    return totals
+
+
+def family_sum(totals, name):
+    values = [v for k, v in totals.items() if k == name or k.startswith(name + "{")]
+    return sum(values) if values else None
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def git_commit(repo):
+    try:
+        rev = subprocess.run(["git", "-C", repo, "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+        dirty = subprocess.run(["git", "-C", repo, "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True)
+        return rev.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+    except OSError:
+        return "unknown"
+
+
+async def replay(args, server, groups, frames):
+    for group in groups:
+        await server.command(group, ".fwlog new bench", "new")
+    gap = 1 / args.rate if args.rate else 0
+    t0 = time.perf_counter()
+    for n, (kind, group, raw) in enumerate(frames):
+        if kind != "event":
+            server.expect(group, kind)
+        await server.send_frame(raw)
+        if gap:
+            delay = t0 + (n + 1) * gap - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif n % 200 == 0:
+            await asyncio.sleep(0)
+    counts = {}
+    for group in groups:
+        reply = await server.command(group, ".fwlog list", "list")
+        m = re.search(r"bench \((\d+)条", reply)
+        counts[group] = int(m.group(1)) if m else None
+    return time.perf_counter() - t0, counts
+
+
+async def run_bench(args):
+    groups, frames, forwards, expected = build_workload(args)
+    server = await ReplayServer(self_id=SELF_ID, latency=args.latency, concurrency=args.concurrency).start()
+    server.forwards = forwards
+    server.action_latency = {"upload_group_file": args.upload_latency}
+    metrics_port = free_port()
+
+    repo = os.path.abspath(args.repo)
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            "BOT_CONFIGS": [{"name": "bench", "url": server.url, "token": ""}],
+            "DB_FILE": os.path.join(tmp, "e2e.db"),
+            "DATA_FILE": os.path.join(tmp, "missing.json"),
+            "SPOOL_DIR": os.path.join(tmp, "spool"),
+            "STORAGE_BACKEND": args.storage,
+            "LOG_LEVEL": "WARNING",
+            "METRICS_PORT": metrics_port,
+            "EXPORT_TRANSFER_MODE": "base64",
+        }
+        if not args.message_rate:
+            config["API_RATE_LIMITS"] = {"message": None, "fetch": None, "upload": None}
+        ctx = multiprocessing.get_context("spawn")
+        proc = ctx.Process(target=backend, args=(repo, config))
+        proc.start()
+        try:
+            deadline = time.monotonic() + 60
+            while not server.connections:
+                assert proc.is_alive(), "backend exited during startup"
+                assert time.monotonic() < deadline, "backend did not connect"
+                await asyncio.sleep(0.05)
+            elapsed, counts = await replay(args, server, groups, frames)
+            totals = await asyncio.get_running_loop().run_in_executor(None, scrape_metrics, metrics_port)
+            peak_rss = peak_rss_mib(proc.pid)
+        finally:
+            proc.terminate()
+            proc.join(30)
+            await server.close()
+
+    shed = family_sum({k: v for k, v in totals.items() if 'outcome="shed"' in k}, "fwlog_events_total")
+    items = sum(expected.values())
+    return {
+        "events": len(frames),
+        "items": items,
+        "seconds": elapsed,
+        "events_per_s": len(frames) / elapsed,
+        "items_per_s": items / elapsed,
+        "list_p50_ms": ms(percentile(server.latencies["list"], 0.5)),
+        "list_p99_ms": ms(percentile(server.latencies["list"], 0.99)),
+        "get_p50_ms": ms(percentile(server.latencies["get"], 0.5)),
+        "get_p99_ms": ms(percentile(server.latencies["get"], 0.99)),
+        "commands": sum(len(v) for v in server.latencies.values()),
+        "command_failures": server.failed,
+        "db_seconds": family_sum(totals, "fwlog_db_seconds_sum"),
+        "event_seconds": family_sum(totals, "fwlog_event_processing_seconds_sum"),
+        "api_seconds": family_sum(totals, "fwlog_api_request_seconds_sum"),
+        "shed": shed,
+        "peak_rss_mib": peak_rss,
+        "counts_ok": counts == expected,
+    }
+
+
+def ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+REPORT = [
+    ("events_per_s", "events/s", "{:10.0f}", True),
+    ("items_per_s", "stored items/s", "{:10.0f}", True),
+    ("list_p50_ms", "list p50 (ms)", "{:10.1f}", False),
+    ("list_p99_ms", "list p99 (ms)", "{:10.1f}", False),
+    ("get_p50_ms", "get p50 (ms)", "{:10.1f}", False),
+    ("get_p99_ms", "get p99 (ms)", "{:10.1f}", False),
+    ("db_seconds", "DB time (s)", "{:10.2f}", False),
+    ("event_seconds", "event handling (s)", "{:10.2f}", False),
+    ("peak_rss_mib", "peak RSS (MiB)", "{:10.1f}", False),
+]
+
+
+def fmt(spec, value):
+    return spec.format(value) if value is not None else f"{'-':>10}"
+
+
+def print_report(run, base=None):
+    res = run["results"]
+    print(f"commit {run['commit']}  {res['events']} events, {res['items']} forward items in {res['seconds']:.2f}s, "
+          f"{res['commands']} commands ({res['command_failures']} failed), shed {res['shed'] or 0:.0f}")
+    if not res["counts_ok"]:
+        print("WARNING: stored item counts differ from what was sent")
+    header = f"{'':<20}{'this run':>10}"
+    if base:
+        header += f"  {base['commit']:>14}  {'change':>8}"
+    print(header)
+    for key, label, spec, higher_better in REPORT:
+        line = f"{label:<20}{fmt(spec, res.get(key))}"
+        if base:
+            old = base["results"].get(key)
+            line += f"  {fmt(spec, old):>14}"
+            if old and res.get(key) is not None:
+                change = res[key] / old - 1
+                better = change > 0 if higher_better else change < 0
+                line += f"  {change:+8.1%}{' better' if better and abs(change) > 0.05 else ''}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--groups", type=int, default=8)
+    parser.add_argument("--forward-ratio", type=float, default=0.01)
+    parser.add_argument("--command-ratio", type=float, default=0.005)
+    parser.add_argument("--get-ratio", type=float, default=0.1, help="share of commands that are .fwlog get")
+    parser.add_argument("--nodes", type=int, default=50, help="messages per forward")
+    parser.add_argument("--large-ratio", type=float, default=0.05, help="share of forwards with --large-nodes")
+    parser.add_argument("--large-nodes", type=int, default=2000)
+    parser.add_argument("--nested-ratio", type=float, default=0.2, help="share of forwards nested --depth deep")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.005, help="fake NapCat time per API call (s)")
+    parser.add_argument("--upload-latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=0, help="API calls the fake NapCat runs at once (0 = any)")
+    parser.add_argument("--rate", type=float, default=0, help="replay rate in events/s (0 = as fast as possible)")
+    parser.add_argument("--message-rate", action="store_true",
+                        help="keep the backend's send_*_msg rate limit (off by default: it would dominate latency)")
+    parser.add_argument("--storage", choices=["sqlite", "memory", "postgres"], default="sqlite")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repo", default=REPO, help="checkout whose fwlog_ws_bot.py is benchmarked")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    params = {k: v for k, v in vars(args).items() if k not in ("repo", "json", "compare")}
+    base = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        if base["params"] != params:
+            diff = sorted(k for k in params if base["params"].get(k) != params[k])
+            print(f"WARNING: workload differs from {args.compare}: {', '.join(diff)}")
+
+    run = {
+        "commit": git_commit(os.path.abspath(args.repo)),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": asyncio.run(run_bench(args)),
+    }
+    print_report(run, base)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(run, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
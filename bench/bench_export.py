@@ -0,0 +1,89 @@
+"""Peak memory of exporting a large log: in-memory pipeline vs. streamed spool file.
+
+    python bench/bench_export.py --lines 200000
+"""
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+
+
+def fill(log_id, lines):
+    batch = 10000
+    for start in range(0, lines, batch):
+        bot.add_log_items(log_id, [
+            {
+                "nickname": f"调查员{i % 5}",
+                "im_userid": str(10000 + i % 5),
+                "time": 1700000000 + i // 3,
+                "message": f"（第 {i} 行）守秘人描述了昏暗走廊尽头的那扇门。\n门把手上沾着些许潮湿的痕迹。",
+                "raw_msg_id": str(i),
+            }
+            for i in range(start, min(start + batch, lines))
+        ])
+
+
+def legacy_export(group_id, name):
+    # What `.fwlog get` did before: full item list, joined text, bytes, base64 bytes, str, f-string.
+    log_obj = bot.get_log_full(group_id, name)
+    full_text = bot.generate_log_text(log_obj)
+    b64_content = base64.b64encode(full_text.encode("utf-8")).decode("utf-8")
+    return f"base64://{b64_content}"
+
+
+def streamed_export(log_obj):
+    return asyncio.run(bot.build_export_param(None, log_obj, "bench.txt"))
+
+
+def streamed_file_only(log_obj):
+    path = bot.new_spool_path()
+    try:
+        bot.export_log_to_file(log_obj["id"], path)
+        return os.path.getsize(path)
+    finally:
+        bot.remove_spool_file(path)
+
+
+def measure(label, func, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<26} peak {peak / 2**20:8.1f} MiB  {elapsed:6.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB_FILE = os.path.join(tmp, "export.db")
+        bot.SPOOL_DIR = os.path.join(tmp, "spool")
+        bot.init_db()
+        log_obj = bot.ensure_log("1000", "bench")
+        fill(log_obj["id"], args.lines)
+        log_obj = bot.get_log_meta("1000", "bench")
+
+        before = measure("before (in memory)", legacy_export, "1000", "bench")
+        after = measure("after (spool + base64)", streamed_export, log_obj)
+        assert before == after
+        del before, after
+        measure("after (cache hit)", streamed_export, log_obj)
+        size = measure("after (spool file only)", streamed_file_only, log_obj)
+        print(f"lines={args.lines} export size {size / 2**20:.1f} MiB")
+        bot.close_db_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+""".fwlog get latency against a large items table, before and after the schema migrations.
+
+Builds an items table spread over many logs (1M rows by default), times the
+storage side of `.fwlog get`/`.fwlog list`/`.fwlog clear` on the un-indexed
+version-0 schema, then runs migrate_schema() in place and times them again.
+
+    python bench/bench_get.py --rows 1000000 --logs 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+
+
+def build(conn, rows, logs):
+    now = int(time.time() * 1000)
+    with conn:
+        conn.executemany(
+            'INSERT INTO logs (group_id, name, ended, created_at, updated_at) VALUES (?, ?, 0, ?, ?)',
+            ((str(1000 + i % 50), f"log-{i}", now + i, now + i) for i in range(logs)),
+        )
+    batch = 50000
+    for start in range(0, rows, batch):
+        # Interleave logs the way concurrent campaigns do in a shared database.
+        with conn:
+            conn.executemany(
+                'INSERT INTO items (log_id, nickname, im_userid, time, message, raw_msg_id) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    (i % logs + 1, f"玩家{i % 7}", str(10000 + i % 7), 1700000000 + i, f"消息内容 {i}", str(i))
+                    for i in range(start, min(start + batch, rows))
+                ),
+            )
+
+
+def timed(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def measure(logs, label):
+    rng = random.Random(42)
+    group_of = lambda n: str(1000 + n % 50)  # noqa: E731
+    targets = [rng.randrange(logs) for _ in range(3)]
+    get_t = sum(timed(bot.get_log_full, group_of(n), f"log-{n}") for n in targets) / len(targets)
+    list_t = timed(bot.get_logs_list, group_of(targets[0]))
+    conn = bot.get_db_connection()
+    count_t = timed(lambda: conn.execute('SELECT COUNT(*) FROM items WHERE log_id = ?', (targets[0] + 1,)).fetchone())
+    n = targets[-1]
+    t0 = time.perf_counter()
+    bot.delete_log(group_of(n), f"log-{n}")
+    delete_t = time.perf_counter() - t0
+    print(f"{label:<8} get_log_full {get_t * 1000:9.2f} ms | get_logs_list {list_t * 1000:9.2f} ms | "
+          f"count {count_t * 1000:8.2f} ms | delete_log {delete_t * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--logs", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB_FILE = os.path.join(tmp, "bench.db")
+        # Create the version-0 schema only, as an old fwlog.db would have it.
+        migrations, bot.MIGRATIONS = bot.MIGRATIONS, []
+        bot.init_db()
+        bot.MIGRATIONS = migrations
+        conn = bot.get_db_connection()
+        t0 = time.perf_counter()
+        build(conn, args.rows, args.logs)
+        print(f"built {args.rows} items over {args.logs} logs in {time.perf_counter() - t0:.1f}s")
+
+        measure(args.logs, "before")
+        t0 = time.perf_counter()
+        bot.migrate_schema(conn)
+        print(f"migrated to schema v{bot.get_schema_version(conn)} in {time.perf_counter() - t0:.1f}s")
+        measure(args.logs, "after")
+        bot.close_db_connection()
+
+
+if __name__ == "__main__":
+    main()
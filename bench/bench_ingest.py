@@ -0,0 +1,102 @@
+"""Ingest a synthetic 5,000-node forward: per-row inserts + commit per forward id vs. one batch.
+
+    python bench/bench_ingest.py --nodes 5000 --forwards 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+from bench_storage import legacy_add_log_items  # noqa: E402
+
+
+def make_nodes(count, offset=0):
+    return [
+        {
+            "message_id": offset + i,
+            "time": 1700000000 + offset + i,
+            "sender": {"user_id": 10000 + i % 6, "nickname": f"玩家{i % 6}"},
+            "message": [{"type": "text", "data": {"text": f"第 {offset + i} 条\n带换行的测试消息"}}],
+        }
+        for i in range(count)
+    ]
+
+
+class FakeClient:
+    """Answers get_forward_msg from memory and swallows replies."""
+
+    name = "bench"
+
+    def __init__(self, forwards):
+        self.forwards = forwards
+        self.forward_sem = asyncio.Semaphore(bot.FORWARD_FETCH_CONCURRENCY)
+
+    async def send_api(self, action, params=None):
+        fid = (params or {}).get("id") or (params or {}).get("message_id")
+        return {"status": "ok", "data": {"messages": self.forwards[fid]}}
+
+    async def send_msg(self, msg_type, target_id, text):
+        pass
+
+
+def make_event(forward_ids, group_id):
+    return {
+        "post_type": "message",
+        "message_type": "group",
+        "group_id": group_id,
+        "message": [{"type": "forward", "data": {"id": fid}} for fid in forward_ids],
+    }
+
+
+async def ingest_legacy(db_file, client, forward_ids, log_id):
+    # The previous handle_forward_message: one add_log_items call (and commit) per forward id.
+    for fid in forward_ids:
+        nodes = await bot.fetch_forward_nodes(client, fid)
+        items = [bot.forward_node_to_item(node) for node in nodes]
+        legacy_add_log_items(db_file, log_id, items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--forwards", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    per_fwd = args.nodes // args.forwards
+    forwards = {f"fwd{i}": make_nodes(per_fwd, i * per_fwd) for i in range(args.forwards)}
+    forward_ids = list(forwards)
+    client = FakeClient(forwards)
+    bot.logger.disabled = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bot.DB_FILE = os.path.join(tmp, "ingest.db")
+        bot.init_db()
+        before = after = float("inf")
+        for r in range(args.rounds):
+            group = str(2000 + r)
+            log_obj = bot.ensure_log(group, "legacy")
+            t0 = time.perf_counter()
+            asyncio.run(ingest_legacy(bot.DB_FILE, client, forward_ids, log_obj["id"]))
+            before = min(before, time.perf_counter() - t0)
+
+            asyncio.run(bot.set_group_state(group, current_log_name="batched", recording=1))
+            t0 = time.perf_counter()
+            asyncio.run(bot.handle_forward_message(client, make_event(forward_ids, group)))
+            after = min(after, time.perf_counter() - t0)
+            assert bot.ensure_log(group, "batched")["item_count"] == per_fwd * args.forwards
+        bot.close_db_connection()
+
+    total = per_fwd * args.forwards
+    print(f"nodes={total} forward_ids={args.forwards}")
+    print(f"before: {before * 1000:8.1f} ms  {total / before:10.0f} nodes/s")
+    print(f"after:  {after * 1000:8.1f} ms  {total / after:10.0f} nodes/s")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""SealDice renderer microbenchmark, with a byte-for-byte check against the original renderer.
+
+    python bench/bench_render.py --items 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+
+
+def legacy_generate_log_text(log_obj):
+    # The renderer as it was before the single-pass rewrite, kept as the reference output.
+    items = log_obj.get("items", [])
+    blocks = []
+    for item in items:
+        ts = item.get("time", 0)
+        dt = bot.format_time(ts)
+        name = item.get("nickname", "Unknown")
+        uid = item.get("im_userid", "")
+        msg = item.get("message", "")
+        header = f"{name}({uid}) {dt}"
+        if msg is None:
+            msg = ""
+        msg = str(msg)
+        content_lines = [f" {line}" for line in msg.splitlines()]
+        content_text = "\n".join(content_lines)
+        blocks.append(f"{header}\n{content_text}")
+    return "\n\n".join(blocks)
+
+
+# Inputs whose output must not change: empty / None / non-str messages, every
+# line break str.splitlines() knows, missing keys, odd timestamps.
+GOLDEN_ITEMS = [
+    {"nickname": "甲", "im_userid": "1", "time": 1700000000, "message": "普通消息"},
+    {"nickname": "乙", "im_userid": "2", "time": 1700000000, "message": "多行\n消息\n"},
+    {"nickname": "丙", "im_userid": "", "time": 1700000001, "message": ""},
+    {"nickname": "丁", "im_userid": "4", "time": 1700000001, "message": None},
+    {"nickname": "戊", "im_userid": "5", "time": 1700000061, "message": "a\r\nb\rc\x0bd\x0ce\x1cf g h\x85i"},
+    {"nickname": "己", "im_userid": "6", "time": 0, "message": "\n\n前后空行\n\n"},
+    {"nickname": None, "im_userid": None, "time": 1700003600.5, "message": 12345},
+    {"im_userid": "8", "time": 1711846800},
+    {"nickname": "[CQ:at,qq=1]", "im_userid": "9", "time": 1700000000, "message": "  leading spaces\t\ttabs"},
+]
+
+
+def check_golden():
+    cases = [GOLDEN_ITEMS, GOLDEN_ITEMS[:1], [], GOLDEN_ITEMS[2:3], list(reversed(GOLDEN_ITEMS))]
+    for items in cases:
+        expected = legacy_generate_log_text({"items": items})
+        assert bot.generate_log_text({"items": items}) == expected, items
+    print(f"golden check passed ({len(cases)} cases)")
+
+
+def make_items(n):
+    return [
+        {
+            "nickname": f"调查员{i % 5}",
+            "im_userid": str(10000 + i % 5),
+            "time": 1700000000 + i // 4,
+            "message": f"第 {i} 行\n守秘人：请进行一次侦查检定。" if i % 3 else f"第 {i} 行",
+        }
+        for i in range(n)
+    ]
+
+
+def best_of(func, arg, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    check_golden()
+    log_obj = {"items": make_items(args.items)}
+    before, expected = best_of(legacy_generate_log_text, log_obj)
+    after, got = best_of(bot.generate_log_text, log_obj)
+    assert got == expected
+    print(f"items={args.items} output {len(expected.encode('utf-8')) / 2**20:.1f} MiB (identical)")
+    print(f"before: {before * 1000:8.1f} ms")
+    print(f"after:  {after * 1000:8.1f} ms")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Multi-process scaling: events/sec through run_supervisor() with 1, 2, 4 ... workers.
+
+Every bot is a fake OneBot server in its own process (so the load generator is
+not the bottleneck). It replays a pre-serialised mix of chatter, `.fwlog help`
+commands and forward messages into several groups, then sends `.fwlog list` to
+each group. The run is timed until every group has answered. The item counts
+in those answers are checked against what was sent.
+
+    python bench/bench_scale.py --bots 4 --workers 1,2,4 --events 20000
+    python bench/bench_scale.py --mode session --bots 2 --workers 1,2
+
+Scaling is bounded by the number of CPU cores and, for the sqlite backend, by
+the single database writer.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+from fake_onebot import FakeOneBot  # noqa: E402
+
+
+def group_event(self_id, group_id, user_id, segments, msg_id):
+    return json.dumps({
+        "self_id": self_id, "time": 1700000000 + msg_id, "post_type": "message", "message_type": "group",
+        "sub_type": "normal", "message_id": msg_id, "group_id": group_id, "user_id": user_id,
+        "sender": {"user_id": user_id, "nickname": f"玩家{user_id % 10}", "card": "", "role": "member"},
+        "message": segments, "raw_message": "", "font": 0,
+    }, ensure_ascii=False)
+
+
+def text(s):
+    return [{"type": "text", "data": {"text": s}}]
+
+
+def build_frames(bot_index, args):
+    """Pre-serialised replay for one bot; returns (frames, forwards, expected items per group)."""
+    rng = random.Random(bot_index)
+    self_id = 10000 + bot_index
+    groups = [100000 * (bot_index + 1) + g for g in range(args.groups)]
+    forwards = {}
+    expected = {g: 0 for g in groups}
+    frames = []
+    for i in range(args.events):
+        group = groups[i % len(groups)]
+        roll = rng.random()
+        if roll < args.forward_ratio:
+            fid = f"b{bot_index}-f{i}"
+            forwards[fid] = [
+                {"message_id": f"{fid}-{n}", "time": 1700000000 + n,
+                 "sender": {"user_id": 20000 + n % 5, "nickname": f"调查员{n % 5}"},
+                 "message": text(f"（{fid} 第 {n} 条）守秘人描述了走廊尽头的那扇门。")}
+                for n in range(args.nodes)
+            ]
+            frames.append(group_event(self_id, group, 30000, [{"type": "forward", "data": {"id": fid}}], i))
+            expected[group] += args.nodes
+        elif roll < args.forward_ratio + args.command_ratio:
+            frames.append(group_event(self_id, group, 30000, text(".fwlog help"), i))
+        else:
+            frames.append(group_event(
+                self_id, group, 30000 + i % 50, text(f"普通聊天消息 {i}，今天的团什么时候开始？[CQ:face,id=1]"), i,
+            ))
+    return self_id, groups, frames, forwards, expected
+
+
+class LoadServer(FakeOneBot):
+    """Counts `.fwlog list` answers per group to know when a replay has been fully processed."""
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.replies = {}
+        self.waiters = {}
+
+    async def on_send_group_msg(self, params):
+        group = int(params["group_id"])
+        msg = str(params.get("message", ""))
+        if msg.startswith("【日志列表】") or msg.startswith("【新建日志】"):
+            self.replies.setdefault(group, []).append(msg)
+            waiter = self.waiters.pop(group, None)
+            if waiter and not waiter.done():
+                waiter.set_result(msg)
+        return {"message_id": len(self.sent)}
+
+    async def command(self, self_id, group, cmd):
+        waiter = self.waiters[group] = asyncio.get_running_loop().create_future()
+        raw = group_event(self_id, group, 30000, text(cmd), 0)
+        for ws in list(self.connections):
+            await ws.send(raw)
+        return await asyncio.wait_for(waiter, 60)
+
+
+def load_server(bot_index, args, connections, ports, ready, go, results):
+    async def run():
+        self_id, groups, frames, forwards, expected = build_frames(bot_index, args)
+        server = await LoadServer(self_id=self_id, latency=args.latency).start()
+        server.forwards = forwards
+        ports.put((bot_index, server.port))
+        while len(server.connections) < connections:
+            await asyncio.sleep(0.05)
+        for group in groups:
+            await server.command(self_id, group, ".fwlog new bench")
+        ready.put(bot_index)
+        await asyncio.get_running_loop().run_in_executor(None, go.wait)
+
+        t0 = time.perf_counter()
+        for n, raw in enumerate(frames):
+            for ws in list(server.connections):
+                await ws.send(raw)
+            if n % 200 == 0:
+                await asyncio.sleep(0)
+        counts = {}
+        for group in groups:
+            reply = await server.command(self_id, group, ".fwlog list")
+            counts[group] = int(re.search(r"bench \((\d+)条", reply).group(1))
+        elapsed = time.perf_counter() - t0
+        ok = counts == expected
+        results.put((bot_index, elapsed, len(frames), ok, counts, expected))
+        await asyncio.Future()
+
+    asyncio.run(run())
+
+
+def backend(config, workers, mode):
+    bot.__dict__.update(config)
+    bot.setup_logging()
+    bot.run_supervisor(workers, mode)
+
+
+def run_once(args, workers):
+    ctx = multiprocessing.get_context("spawn")
+    ports, ready, results = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    go = ctx.Event()
+    connections = workers if args.mode == "session" else 1
+    servers = [
+        ctx.Process(target=load_server, args=(i, args, connections, ports, ready, go, results), daemon=True)
+        for i in range(args.bots)
+    ]
+    for p in servers:
+        p.start()
+    port_of = dict(ports.get(timeout=60) for _ in servers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            "BOT_CONFIGS": [
+                {"name": f"bot{i}", "url": f"ws://127.0.0.1:{port_of[i]}", "token": ""} for i in range(args.bots)
+            ],
+            "DB_FILE": os.path.join(tmp, "scale.db"),
+            "DATA_FILE": os.path.join(tmp, "missing.json"),
+            "SPOOL_DIR": os.path.join(tmp, "spool"),
+            "STORAGE_BACKEND": args.storage,
+            "LOG_LEVEL": "WARNING",
+            "METRICS_PORT": 0,
+            # Every `.fwlog help` gets a reply; at the default 1 msg/s per bot the
+            # run would measure the rate limit, not the backend
+            "API_RATE_LIMITS": {"message": None, "fetch": None, "upload": None},
+        }
+        supervisor = ctx.Process(target=backend, args=(config, workers, args.mode))
+        supervisor.start()
+        try:
+            for _ in servers:
+                ready.get(timeout=120)
+            go.set()
+            runs = [results.get(timeout=600) for _ in servers]
+        finally:
+            supervisor.terminate()
+            supervisor.join(30)
+            for p in servers:
+                p.terminate()
+
+    for bot_index, _, _, ok, counts, expected in runs:
+        assert ok, f"bot{bot_index}: stored {counts}, expected {expected}"
+    total = sum(r[2] for r in runs)
+    wall = max(r[1] for r in runs)
+    return total, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bots", type=int, default=4)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--mode", choices=["bot", "session"], default="bot")
+    parser.add_argument("--storage", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--events", type=int, default=20000, help="events per bot")
+    parser.add_argument("--groups", type=int, default=8, help="groups per bot")
+    parser.add_argument("--forward-ratio", type=float, default=0.01)
+    parser.add_argument("--command-ratio", type=float, default=0.005)
+    parser.add_argument("--nodes", type=int, default=20, help="messages per forward")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake API latency (s)")
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} bots={args.bots} mode={args.mode} storage={args.storage} "
+          f"events/bot={args.events} forwards={args.forward_ratio:.1%} x {args.nodes} nodes")
+    base = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        total, wall = run_once(args, workers)
+        rate = total / wall
+        base = base or rate
+        print(f"workers={workers:<3} {total} events in {wall:6.2f}s  {rate:9.0f} events/s  "
+              f"x{rate / base:.2f}  (linear x{workers})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Events/sec of the forward-ingest DB path: connect-per-call vs. shared WAL connection.
+
+Each simulated event performs the same storage work as handle_forward_message:
+ensure_group_state + ensure_log + add_log_items.
+
+    python bench/bench_storage.py --events 2000 --items 10
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+
+
+# Baseline: the original helpers, one sqlite3.connect()/commit/close per call,
+# executed directly on the event loop.
+def legacy_conn(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def legacy_ensure_group_state(db_file, group_id):
+    conn = legacy_conn(db_file)
+    c = conn.cursor()
+    c.execute('SELECT * FROM groups WHERE group_id = ?', (group_id,))
+    row = c.fetchone()
+    if not row:
+        now = int(time.time() * 1000)
+        c.execute('INSERT INTO groups (group_id, current_log_name, recording, created_at, updated_at) '
+                  'VALUES (?, ?, 1, ?, ?)', (group_id, "bench", now, now))
+        conn.commit()
+        c.execute('SELECT * FROM groups WHERE group_id = ?', (group_id,))
+        row = c.fetchone()
+    conn.close()
+    return dict(row)
+
+def legacy_ensure_log(db_file, group_id, name):
+    conn = legacy_conn(db_file)
+    c = conn.cursor()
+    c.execute('SELECT * FROM logs WHERE group_id = ? AND name = ?', (group_id, name))
+    row = c.fetchone()
+    if not row:
+        now = int(time.time() * 1000)
+        c.execute('INSERT INTO logs (group_id, name, ended, created_at, updated_at) VALUES (?, ?, 0, ?, ?)',
+                  (group_id, name, now, now))
+        conn.commit()
+        c.execute('SELECT * FROM logs WHERE group_id = ? AND name = ?', (group_id, name))
+        row = c.fetchone()
+    conn.close()
+    return dict(row)
+
+def legacy_add_log_items(db_file, log_id, items):
+    conn = legacy_conn(db_file)
+    c = conn.cursor()
+    c.execute('SELECT COUNT(*) FROM items WHERE log_id = ?', (log_id,))
+    old_count = c.fetchone()[0]
+    for item in items:
+        c.execute('INSERT INTO items (log_id, nickname, im_userid, time, message, raw_msg_id) '
+                  'VALUES (?, ?, ?, ?, ?, ?)',
+                  (log_id, item["nickname"], item["im_userid"], item["time"], item["message"], item["raw_msg_id"]))
+    c.execute('UPDATE logs SET updated_at = ? WHERE id = ?', (int(time.time() * 1000), log_id))
+    conn.commit()
+    conn.close()
+    return old_count, old_count + len(items)
+
+
+def make_items(n, base):
+    return [
+        {
+            "nickname": f"玩家{i % 5}",
+            "im_userid": str(10000 + i % 5),
+            "time": 1700000000 + base + i,
+            "message": f"第 {base + i} 条测试消息",
+            "raw_msg_id": str(base + i),
+        }
+        for i in range(n)
+    ]
+
+
+async def heartbeat(stop, samples):
+    # Measures how late the loop wakes up, i.e. how long readers would stall.
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append(time.perf_counter() - t0 - 0.001)
+
+
+async def run_legacy(db_file, events, items_per_event):
+    stop, samples = asyncio.Event(), []
+    hb = asyncio.create_task(heartbeat(stop, samples))
+    t0 = time.perf_counter()
+    for i in range(events):
+        session = str(1000 + i % 20)
+        legacy_ensure_group_state(db_file, session)
+        log_obj = legacy_ensure_log(db_file, session, "bench")
+        legacy_add_log_items(db_file, log_obj["id"], make_items(items_per_event, i * items_per_event))
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await hb
+    return elapsed, max(samples or [0])
+
+
+async def run_shared(events, items_per_event):
+    stop, samples = asyncio.Event(), []
+    hb = asyncio.create_task(heartbeat(stop, samples))
+    t0 = time.perf_counter()
+    for i in range(events):
+        session = str(1000 + i % 20)
+        await bot.run_db(bot.ensure_group_state, session)
+        log_obj = await bot.run_db(bot.ensure_log, session, "bench")
+        await bot.run_db(bot.add_log_items, log_obj["id"], make_items(items_per_event, i * items_per_event))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await hb
+    return elapsed, max(samples or [0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        bot.DB_FILE = legacy_db
+        bot.init_db()
+        bot.close_db_connection()
+        # The original database ran in the default rollback-journal mode.
+        conn = sqlite3.connect(legacy_db)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+        before, before_stall = asyncio.run(run_legacy(legacy_db, args.events, args.items))
+
+        bot.DB_FILE = os.path.join(tmp, "shared.db")
+        bot.init_db()
+        after, after_stall = asyncio.run(run_shared(args.events, args.items))
+        bot.close_db_connection()
+
+    print(f"events={args.events} items/event={args.items}")
+    print(f"before: {args.events / before:10.1f} events/s  max loop stall {before_stall * 1000:7.2f} ms")
+    print(f"after:  {args.events / after:10.1f} events/s  max loop stall {after_stall * 1000:7.2f} ms")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Connection-loss checks for BotClient against the fake OneBot server.
+
+    python bench/check_reconnect.py
+
+Covers: pending requests failing as soon as the connection drops, idempotent
+actions being retried after the reconnect, a half-open connection (traffic
+silently blackholed by a proxy) being detected by the ping watchdog and by
+missed OneBot heartbeats, a server restart, the backoff delays, and that the
+settings used here reach worker processes.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+from fake_onebot import FakeOneBot  # noqa: E402
+
+
+class BlackholeProxy:
+    """TCP proxy whose existing connections can be frozen: bytes are swallowed, nothing is closed."""
+
+    def __init__(self, target_port):
+        self.target_port = target_port
+        self.pipes = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.accept, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def accept(self, reader, writer):
+        try:
+            up_reader, up_writer = await asyncio.open_connection("127.0.0.1", self.target_port)
+        except OSError:
+            # Server down: refuse like it would
+            writer.close()
+            return
+        pipe = {"frozen": False}
+        self.pipes.append(pipe)
+        await asyncio.gather(self.pump(reader, up_writer, pipe), self.pump(up_reader, writer, pipe),
+                             return_exceptions=True)
+        writer.close()
+        up_writer.close()
+
+    async def pump(self, reader, writer, pipe):
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                writer.close()
+                return
+            if not pipe["frozen"]:
+                writer.write(data)
+                await writer.drain()
+
+    def freeze(self):
+        for pipe in self.pipes:
+            pipe["frozen"] = True
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def wait_reconnected(client, old_ws, timeout=10):
+    deadline = time.monotonic() + timeout
+    while client.ws_conn is None or client.ws_conn is old_ws:
+        assert time.monotonic() < deadline, "client did not reconnect"
+        await asyncio.sleep(0.01)
+
+
+async def check_drop(server, client):
+    server.forwards["f1"] = [{"message_id": "1", "time": 1700000000, "sender": {"user_id": 1, "nickname": "甲"},
+                              "message": [{"type": "text", "data": {"text": "你好"}}]}]
+    server.stalled = {"send_group_msg", "get_forward_msg"}
+    old_ws = client.ws_conn
+    send = asyncio.create_task(client.send_api("send_group_msg", {"group_id": "1", "message": "x"}))
+    fetch = asyncio.create_task(client.send_api("get_forward_msg", {"id": "f1"}))
+    await asyncio.sleep(0.2)
+    assert len(client.pending) == 2
+
+    server.stalled = set()
+    t0 = time.monotonic()
+    server.drop()
+    try:
+        await send
+    except bot.BotDisconnected:
+        failed_after = time.monotonic() - t0
+    else:
+        raise AssertionError("send_group_msg should fail when the connection drops")
+    assert failed_after < 1, f"pending request took {failed_after:.2f}s to fail"
+    resp = await asyncio.wait_for(fetch, 10)
+    assert resp["status"] == "ok" and resp["data"]["messages"][0]["message_id"] == "1"
+    assert client.pending == {}
+    await wait_reconnected(client, old_ws)
+    print(f"drop: pending send failed after {failed_after * 1000:.0f} ms, get_forward_msg retried after reconnect")
+
+
+async def check_half_open(server, proxy, client):
+    old_ws = client.ws_conn
+    server.stalled = {"send_group_msg"}
+    send = asyncio.create_task(client.send_api("send_group_msg", {"group_id": "1", "message": "x"}))
+    await asyncio.sleep(0.1)
+    t0 = time.monotonic()
+    proxy.freeze()
+    try:
+        await asyncio.wait_for(send, 10)
+    except bot.BotDisconnected:
+        pass
+    else:
+        raise AssertionError("request on a half-open connection should fail")
+    detected = time.monotonic() - t0
+    server.stalled = set()
+    limit = bot.WS_IDLE_TIMEOUT + bot.WS_PING_TIMEOUT
+    assert detected < limit + 1, f"half-open connection detected after {detected:.2f}s"
+    await wait_reconnected(client, old_ws)
+    resp = await client.send_api("send_group_msg", {"group_id": "1", "message": "y"})
+    assert resp["status"] == "ok"
+    print(f"half-open (idle {bot.WS_IDLE_TIMEOUT}s + ping {bot.WS_PING_TIMEOUT}s): "
+          f"detected after {detected:.2f}s, reconnected")
+
+
+async def check_heartbeat(server, proxy, client):
+    # With heartbeats every 0.2 s the watchdog must not wait for WS_IDLE_TIMEOUT
+    saved, bot.WS_IDLE_TIMEOUT = bot.WS_IDLE_TIMEOUT, 30
+    try:
+        await server.push_event({"post_type": "meta_event", "meta_event_type": "heartbeat",
+                                 "status": {"online": True, "good": True}, "interval": 200})
+        await asyncio.sleep(0.1)
+        assert client.heartbeat_interval == 0.2, client.heartbeat_interval
+        # Heartbeats keep the connection quiet-free: no reconnect while they flow
+        old_ws = client.ws_conn
+        for _ in range(10):
+            await server.push_event({"post_type": "meta_event", "meta_event_type": "heartbeat", "interval": 200})
+            await asyncio.sleep(0.2)
+        assert client.ws_conn is old_ws, "healthy connection was dropped"
+
+        t0 = time.monotonic()
+        proxy.freeze()
+        await wait_reconnected(client, old_ws)
+        detected = time.monotonic() - t0
+        assert detected < 2 * 0.2 + bot.WS_PING_TIMEOUT + 1, detected
+        print(f"heartbeat: missed heartbeats detected after {detected:.2f}s (WS_IDLE_TIMEOUT=30 not used)")
+    finally:
+        bot.WS_IDLE_TIMEOUT = saved
+        client.heartbeat_interval = None
+
+
+async def check_restart(server, client):
+    port = server.port
+    await server.close()
+    server.drop()
+    while client.ws_conn is not None:
+        await asyncio.sleep(0.01)
+    # Issued while the bot is down: waits for the reconnect, then goes out once
+    fetch = asyncio.create_task(client.send_api("get_forward_msg", {"id": "f2"}))
+    send = asyncio.create_task(client.send_api("send_group_msg", {"group_id": "1", "message": "z"}))
+    await asyncio.sleep(0.5)
+    assert send.done() and isinstance(send.exception(), bot.BotDisconnected)
+    server = await FakeOneBot(port=port).start()
+    server.forwards["f2"] = [{"message_id": "2", "time": 1700000000, "sender": {"user_id": 1, "nickname": "甲"},
+                              "message": [{"type": "text", "data": {"text": "又见面了"}}]}]
+    resp = await asyncio.wait_for(fetch, 10)
+    assert resp["data"]["messages"][0]["message_id"] == "2"
+    print(f"restart: reconnected after {client.backoff.attempt} attempts, queued get_forward_msg answered")
+    return server
+
+
+def check_backoff():
+    b = bot.Backoff()
+    delays = [b.next_delay() for _ in range(12)]
+    for n, d in enumerate(delays):
+        ceiling = min(bot.RECONNECT_MAX_DELAY, bot.RECONNECT_BASE_DELAY * 2 ** n)
+        assert ceiling / 2 <= d <= ceiling, (n, d)
+    assert len({round(d, 6) for d in delays}) == len(delays), "delays are jittered"
+    b.reset()
+    assert b.next_delay() <= bot.RECONNECT_BASE_DELAY
+    print("backoff: " + ", ".join(f"{d:.2f}" for d in delays))
+
+
+def check_worker_config():
+    # Worker processes only get the settings in WORKER_CONFIG_NAMES
+    names = {"RECONNECT_BASE_DELAY", "RECONNECT_MAX_DELAY", "RECONNECT_RESET_AFTER", "WS_IDLE_TIMEOUT",
+             "WS_PING_TIMEOUT", "API_TIMEOUT", "IDEMPOTENT_ACTIONS", "API_RETRY_WAIT"}
+    missing = names - set(bot.WORKER_CONFIG_NAMES)
+    assert not missing, f"not passed to worker processes: {sorted(missing)}"
+    print(f"worker config: {len(names)} reconnect / timeout settings passed to worker processes")
+
+
+async def main_async():
+    bot.logger.disabled = True
+    check_worker_config()
+    check_backoff()
+    bot.RECONNECT_BASE_DELAY = 0.05
+    bot.RECONNECT_MAX_DELAY = 0.5
+    bot.WS_IDLE_TIMEOUT = 0.5
+    bot.WS_PING_TIMEOUT = 0.5
+
+    server = await FakeOneBot().start()
+    proxy = await BlackholeProxy(server.port).start()
+    client = bot.BotClient({"name": "fake", "url": f"ws://127.0.0.1:{proxy.port}", "token": ""})
+    task = asyncio.create_task(client.run())
+    await asyncio.wait_for(client.connected.wait(), 10)
+    try:
+        await check_drop(server, client)
+        await check_half_open(server, proxy, client)
+        await check_heartbeat(server, proxy, client)
+        server = await check_restart(server, client)
+        print("reconnect check passed")
+    finally:
+        task.cancel()
+        await proxy.close()
+        await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async())
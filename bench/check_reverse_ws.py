@@ -0,0 +1,168 @@
+"""Reverse WebSocket checks: fake NapCat accounts dial into fwlog's listener.
+
+    python bench/check_reverse_ws.py
+    python bench/check_reverse_ws.py --accounts 50
+
+Covers the handshake checks (path, role, X-Self-ID, global and per-account
+tokens), commands answered through clients registered on the fly, an account
+reconnecting (same BotClient, old connection closed) and many accounts on
+one listener.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+
+from websockets.exceptions import InvalidStatusCode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fwlog_ws_bot as bot  # noqa: E402
+from fake_onebot import FakeOneBot  # noqa: E402
+
+
+class Account(FakeOneBot):
+    """A fake NapCat account that records fwlog's replies per group."""
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.waiters = {}
+
+    async def on_send_group_msg(self, params):
+        waiter = self.waiters.pop(int(params["group_id"]), None)
+        if waiter and not waiter.done():
+            waiter.set_result(str(params.get("message", "")))
+        return {"message_id": len(self.sent)}
+
+    async def command(self, group, text):
+        waiter = self.waiters[group] = asyncio.get_running_loop().create_future()
+        await self.push_event({
+            "post_type": "message", "message_type": "group", "sub_type": "normal", "message_id": 1,
+            "group_id": group, "user_id": 30000, "sender": {"user_id": 30000, "nickname": "KP"},
+            "message": [{"type": "text", "data": {"text": text}}], "raw_message": text, "font": 0,
+        })
+        return await asyncio.wait_for(waiter, 10)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def dial(account, url, **kw):
+    task = asyncio.create_task(account.dial(url, **kw))
+    deadline = time.monotonic() + 10
+    while str(account.self_id) not in bot.reverse_server.clients or \
+            bot.reverse_server.clients[str(account.self_id)].ws_conn is None:
+        if task.done():
+            task.result()
+        assert time.monotonic() < deadline, "account was not registered"
+        await asyncio.sleep(0.01)
+    return task
+
+
+async def expect_rejected(url, status, **kw):
+    try:
+        await Account(self_id=kw.pop("self_id", 10009), **kw).dial(url)
+    except InvalidStatusCode as e:
+        assert e.status_code == status, (e.status_code, status)
+    else:
+        raise AssertionError(f"handshake should be rejected with {status}")
+
+
+async def check_handshake(url):
+    bot.REVERSE_WS_TOKENS = {"10002": "per-account"}
+    await expect_rejected(url, 401, token="wrong")
+    await expect_rejected(url, 401, self_id=10002, token="secret")
+    await expect_rejected(url, 401)
+    await expect_rejected(url.replace("/onebot/v11/ws", "/other"), 404, token="secret")
+    try:
+        await Account(self_id=10009, token="secret").dial(url, headers={"X-Client-Role": "Event"})
+    except InvalidStatusCode as e:
+        assert e.status_code == 400
+    else:
+        raise AssertionError("Event role should be rejected")
+    try:
+        await Account(token="secret").dial(url, headers={"X-Self-ID": ""})
+    except InvalidStatusCode as e:
+        assert e.status_code == 400
+    else:
+        raise AssertionError("missing X-Self-ID should be rejected")
+    assert bot.reverse_server.clients == {}
+    print("handshake: bad token / path / role / X-Self-ID rejected")
+
+
+async def check_commands(url):
+    a = Account(self_id=10001, token="secret")
+    b = Account(self_id=10002, token="per-account")
+    tasks = [await dial(a, url), await dial(b, url)]
+    assert sorted(bot.reverse_server.clients) == ["10001", "10002"]
+    assert all(c in bot.bot_clients for c in bot.reverse_server.clients.values())
+    assert (await a.command(500001, ".fwlog new 反向")).startswith("【新建日志】")
+    assert (await b.command(500002, ".fwlog new 反向二")).startswith("【新建日志】")
+    assert "反向二" in await b.command(500002, ".fwlog list")
+    print("commands: two accounts registered on the fly, replies go back over their own connection")
+    return a, tasks
+
+
+async def check_reconnect(url, a, old_task):
+    client = bot.reverse_server.clients["10001"]
+    old_ws = client.ws_conn
+    again = Account(self_id=10001, token="secret")
+    task = asyncio.create_task(again.dial(url))
+    while client.ws_conn is old_ws:
+        await asyncio.sleep(0.01)
+    await asyncio.wait_for(old_task, 10)
+    assert bot.reverse_server.clients["10001"] is client, "client is reused across connections"
+    assert (await again.command(500001, ".fwlog list")).startswith("【日志列表】")
+    print("reconnect: new connection replaced the old one on the same BotClient")
+    return task
+
+
+async def check_many(url, count):
+    accounts = [Account(self_id=20000 + i, token="secret") for i in range(count)]
+    t0 = time.perf_counter()
+    tasks = await asyncio.gather(*(dial(acc, url) for acc in accounts))
+    joined = time.perf_counter() - t0
+    replies = await asyncio.gather(*(acc.command(600000 + i, ".fwlog new 多账号")
+                                     for i, acc in enumerate(accounts)))
+    assert all(r.startswith("【新建日志】") for r in replies)
+    elapsed = time.perf_counter() - t0
+    print(f"many: {count} accounts connected in {joined * 1000:.0f} ms, all answered in {elapsed * 1000:.0f} ms")
+    return tasks
+
+
+async def main_async(args):
+    bot.logger.disabled = True
+    bot.REVERSE_WS_PORT = free_port()
+    bot.REVERSE_WS_PATH = "/onebot/v11/ws"
+    bot.REVERSE_WS_TOKEN = "secret"
+    bot.storage = bot.MemoryStorage()
+    await bot.storage.init()
+    processor = asyncio.create_task(bot.dispatcher.run())
+    await bot.reverse_server.start()
+    url = f"ws://127.0.0.1:{bot.REVERSE_WS_PORT}{bot.REVERSE_WS_PATH}"
+    tasks = []
+    try:
+        await check_handshake(url)
+        a, conn_tasks = await check_commands(url)
+        tasks += conn_tasks
+        tasks.append(await check_reconnect(url, a, conn_tasks[0]))
+        tasks += await check_many(url, args.accounts)
+        print("reverse WebSocket check passed")
+    finally:
+        await bot.reverse_server.close()
+        for task in tasks + [processor]:
+            task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=30)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""A local fake OneBot v11 (NapCat-flavoured) forward WebSocket server.
+
+Answers the actions fwlog uses -- get_forward_msg, send_*_msg,
+upload_*_file and NapCat's chunked upload_file_stream -- from memory, and can
+push events to connected bots. It can also dial into fwlog's reverse
+WebSocket listener instead (dial()). Used by the benchmarks; it can also be run on
+its own to point a real fwlog_ws_bot at it:
+
+    python bench/fake_onebot.py --port 3001
+    python bench/fake_onebot.py --check-upload   # exercise BotClient uploads against it
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import urllib.request
+
+from websockets.exceptions import ConnectionClosed
+from websockets.legacy.client import connect
+from websockets.legacy.server import serve
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeOneBot:
+    def __init__(self, host="127.0.0.1", port=0, token="", self_id=10001, latency=0.0, concurrency=0):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.self_id = self_id
+        self.latency = latency
+        # action -> latency (s), overriding `latency` for that action
+        self.action_latency = {}
+        # NapCat works through a limited number of requests at a time; 0 = unlimited
+        self.slots = asyncio.Semaphore(concurrency) if concurrency else None
+        self.forwards = {}
+        self.sent = []
+        self.uploads = {}
+        self.streams = {}
+        # chunk_index -> how many times that chunk should still be rejected
+        self.fail_chunks = {}
+        # actions that are received but never answered
+        self.stalled = set()
+        self.connections = set()
+        self.spool = tempfile.mkdtemp(prefix="fake-onebot-")
+        self.server = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await serve(self.handler, self.host, self.port, max_size=None)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handler(self, ws, path=None):
+        if self.token and ws.request_headers.get("Authorization") != f"Bearer {self.token}":
+            await ws.close(code=1008, reason="unauthorized")
+            return
+        await self.serve_connection(ws)
+
+    async def dial(self, url, headers=None):
+        """Reverse WebSocket: connect to fwlog's listener the way NapCat does; returns when the connection ends."""
+        extra = {"X-Self-ID": str(self.self_id), "X-Client-Role": "Universal"}
+        if self.token:
+            extra["Authorization"] = f"Bearer {self.token}"
+        extra.update(headers or {})
+        async with connect(url, extra_headers=extra, max_size=None) as ws:
+            await self.serve_connection(ws)
+
+    async def serve_connection(self, ws):
+        self.connections.add(ws)
+        try:
+            async for raw in ws:
+                req = json.loads(raw)
+                asyncio.create_task(self.answer(ws, req))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(ws)
+
+    def drop(self):
+        """Abort every connection without a closing handshake, like a crashed NapCat or a reset link."""
+        for ws in list(self.connections):
+            ws.transport.abort()
+
+    async def answer(self, ws, req):
+        if self.slots is not None:
+            async with self.slots:
+                await self.respond(ws, req)
+        else:
+            await self.respond(ws, req)
+
+    async def respond(self, ws, req):
+        action = req.get("action", "")
+        latency = self.action_latency.get(action, self.latency)
+        if latency:
+            await asyncio.sleep(latency)
+        params = req.get("params") or {}
+        self.sent.append((action, params))
+        if action in self.stalled:
+            return
+        handler = getattr(self, f"on_{action}", None)
+        if handler is None:
+            resp = {"status": "failed", "retcode": 1404, "data": None, "wording": f"unknown action {action}"}
+        else:
+            try:
+                resp = {"status": "ok", "retcode": 0, "data": await handler(params)}
+            except Exception as e:
+                resp = {"status": "failed", "retcode": 1200, "data": None, "wording": str(e)}
+        resp["echo"] = req.get("echo")
+        try:
+            await ws.send(json.dumps(resp, ensure_ascii=False))
+        except Exception:
+            pass
+
+    async def push_event(self, event):
+        event.setdefault("self_id", self.self_id)
+        event.setdefault("time", 1700000000)
+        raw = json.dumps(event, ensure_ascii=False)
+        for ws in list(self.connections):
+            await ws.send(raw)
+
+    # --- actions -----------------------------------------------------------
+
+    async def on_get_forward_msg(self, params):
+        fid = str(params.get("id") or params.get("message_id") or "")
+        if fid not in self.forwards:
+            raise KeyError(f"forward {fid} not found")
+        return {"messages": self.forwards[fid]}
+
+    async def on_send_group_msg(self, params):
+        return {"message_id": len(self.sent)}
+
+    async def on_send_private_msg(self, params):
+        return {"message_id": len(self.sent)}
+
+    async def read_file_param(self, file):
+        if file.startswith("base64://"):
+            return base64.b64decode(file[len("base64://"):])
+        if file.startswith("http://") or file.startswith("https://"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, lambda: urllib.request.urlopen(file).read())
+        if file.startswith("file://"):
+            file = urllib.request.url2pathname(file[len("file://"):])
+        with open(file, "rb") as f:
+            return f.read()
+
+    async def on_upload_group_file(self, params):
+        self.uploads[params["name"]] = await self.read_file_param(params["file"])
+        return None
+
+    async def on_upload_private_file(self, params):
+        self.uploads[params["name"]] = await self.read_file_param(params["file"])
+        return None
+
+    async def on_upload_file_stream(self, params):
+        stream_id = params["stream_id"]
+        if params.get("is_complete"):
+            st = self.streams.pop(stream_id)
+            if len(st["chunks"]) != st["total"]:
+                raise ValueError("missing chunks")
+            data = b"".join(st["chunks"][i] for i in range(st["total"]))
+            if st["sha256"] and hashlib.sha256(data).hexdigest() != st["sha256"]:
+                raise ValueError("sha256 mismatch")
+            path = os.path.join(self.spool, f"{stream_id}-{st['filename']}")
+            with open(path, "wb") as f:
+                f.write(data)
+            return {"type": "response", "status": "file_complete", "file_path": path, "file_size": len(data)}
+
+        index = params["chunk_index"]
+        if self.fail_chunks.get(index, 0) > 0:
+            self.fail_chunks[index] -= 1
+            raise IOError(f"injected failure for chunk {index}")
+        st = self.streams.setdefault(stream_id, {
+            "chunks": {},
+            "total": params["total_chunks"],
+            "sha256": params.get("expected_sha256"),
+            "filename": params.get("filename", "upload"),
+        })
+        st["chunks"][index] = base64.b64decode(params["chunk_data"])
+        return {"type": "stream", "status": "chunk_received",
+                "received_chunks": len(st["chunks"]), "total_chunks": st["total"]}
+
+
+async def connect_bot(server, name="fake"):
+    import fwlog_ws_bot as bot
+    client = bot.BotClient({"name": name, "url": server.url, "token": server.token})
+    task = asyncio.create_task(client.run())
+    while client.ws_conn is None:
+        await asyncio.sleep(0.01)
+    return client, task
+
+
+async def check_upload():
+    import fwlog_ws_bot as bot
+    server = await FakeOneBot(token="secret").start()
+    client, task = await connect_bot(server)
+    payload = os.urandom(3 * bot.STREAM_CHUNK_SIZE + 12345)
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(payload)
+    try:
+        server.fail_chunks = {1: 2}
+        remote = await client.upload_file_stream(f.name, "stream.txt")
+        await client.upload_group_file("1000", remote, "stream.txt")
+        assert server.uploads["stream.txt"] == payload, "stream upload mismatch"
+
+        await client.upload_private_file("2000", "base64://" + base64.b64encode(payload).decode(), "b64.txt")
+        assert server.uploads["b64.txt"] == payload, "base64 upload mismatch"
+
+        server.fail_chunks = {0: bot.STREAM_CHUNK_RETRIES}
+        try:
+            await client.upload_file_stream(f.name, "fail.txt")
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("exhausted retries should raise")
+        print("upload check passed:", len(payload), "bytes,",
+              sum(1 for a, _ in server.sent if a == "upload_file_stream"), "upload_file_stream calls")
+    finally:
+        os.remove(f.name)
+        task.cancel()
+        await server.close()
+
+
+async def serve_forever(port, token):
+    server = await FakeOneBot(port=port, token=token).start()
+    print("fake OneBot listening on", server.url)
+    await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--token", default="")
+    parser.add_argument("--check-upload", action="store_true")
+    args = parser.parse_args()
+    if args.check_upload:
+        asyncio.run(check_upload())
+    else:
+        asyncio.run(serve_forever(args.port, args.token))
+
+
+if __name__ == "__main__":
+    main()